@@ -15,8 +15,12 @@ Features:
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, colorchooser
 import asyncio
+import bisect
+import difflib
 import json
+import socket
 import threading
+import time
 import websockets
 import requests
 from datetime import datetime
@@ -25,6 +29,37 @@ from typing import Optional
 
 from dotenv import load_dotenv
 import os
+
+# msgpack is optional; fall back to JSON text frames without it
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# orjson is optional; it speeds up the JSON encode/decode paths
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def encode_message(message):
+    """Encode a wire message as a msgpack binary frame, or JSON text without msgpack"""
+    if msgpack is not None:
+        message = dict(message)
+        message["v"] = 2
+        return msgpack.packb(message, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message)
+
+def decode_message(data):
+    """Decode a wire message from a binary (msgpack) or text (JSON) frame"""
+    if isinstance(data, (bytes, bytearray)) and msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Import configuration
 load_dotenv(".env")
 class Config:
@@ -40,15 +75,21 @@ class Config:
 
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
+
+    # URLs built once at class-creation time; the underlying env vars
+    # do not change at runtime, so callers get a cached string
+    SERVER_URL: str = f"http://{CLIENT_HOST}:{CLIENT_PORT}"
+    WEBSOCKET_URL: str = f"ws://{WS_HOST}:{WS_PORT}/ws"
+
     @classmethod
     def get_server_url(cls) -> str:
         """Get the server URL for REST API calls"""
-        return f"http://{cls.CLIENT_HOST}:{cls.CLIENT_PORT}"
-    
+        return cls.SERVER_URL
+
     @classmethod
     def get_websocket_url(cls) -> str:
         """Get the WebSocket URL for real-time connections"""
-        return f"ws://{cls.WS_HOST}:{cls.WS_PORT}/ws"
+        return cls.WEBSOCKET_URL
     
  
     @classmethod
@@ -75,6 +116,20 @@ class CollaborativeTextEditor:
         self.current_text = ""
         self.last_sent_text = ""
         self.is_updating_from_server = False
+
+        # Cached line-start offsets of current_text for offset-to-index
+        # conversion; invalidated whenever current_text changes
+        self._line_starts = None
+
+        # Outgoing operations waiting to be batched into one frame
+        self._pending_ops = []
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+
+        # Single persistent event loop for all WebSocket I/O; the
+        # connection and every send run on this loop's thread
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
         
         # Appearance settings
         self.bg_color = "white"
@@ -172,8 +227,13 @@ class CollaborativeTextEditor:
         self.text_widget.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         
-        # Bind text changes
-        self.text_widget.bind('<KeyRelease>', self.on_text_change)
+        # Capture local edits as deltas at the Tcl level; fall back to
+        # diffing the full buffer on every keystroke if that fails
+        try:
+            self._install_text_proxy()
+        except tk.TclError as e:
+            print(f"Falling back to full-buffer diffing: {e}")
+            self.text_widget.bind('<KeyRelease>', self.on_text_change)
         
         # Buttons frame (simplified since main actions are now in menu)
         button_frame = ttk.Frame(main_frame)
@@ -464,9 +524,9 @@ class CollaborativeTextEditor:
                     # Update GUI in main thread
                     self.root.after(0, self.update_text_display)
                 
-                # Connect to WebSocket
-                asyncio.run(self.websocket_connection())
-                
+                # Connect to WebSocket on the persistent loop
+                asyncio.run_coroutine_threadsafe(self.websocket_connection(), self._loop)
+
             except Exception as e:
                 print(f"Connection error: {e}")
                 self.root.after(0, lambda: self.status_label.config(text="Connection Failed", foreground="red"))
@@ -477,7 +537,17 @@ class CollaborativeTextEditor:
     async def websocket_connection(self):
         """Handle WebSocket connection and messages"""
         try:
-            async with websockets.connect(self.server_url) as websocket:
+            # compression=None skips permessage-deflate: for small op
+            # frames the zlib pass costs CPU and saves almost no bytes
+            async with websockets.connect(self.server_url, compression=None) as websocket:
+                # Disable Nagle's algorithm so small frames go out immediately
+                try:
+                    sock = websocket.transport.get_extra_info("socket")
+                    if sock is not None:
+                        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                except (AttributeError, OSError) as e:
+                    print(f"Could not set TCP_NODELAY: {e}")
+
                 self.websocket = websocket
                 self.connected = True
                 self.root.after(0, lambda: self.status_label.config(text="Connected", foreground="green"))
@@ -494,7 +564,7 @@ class CollaborativeTextEditor:
     async def handle_websocket_message(self, message):
         """Handle incoming WebSocket messages"""
         try:
-            data = json.loads(message)
+            data = decode_message(message)
             message_type = data.get("type")
             
             if message_type == "initial_state":
@@ -504,31 +574,264 @@ class CollaborativeTextEditor:
                 self.root.after(0, self.update_text_display)
                 
             elif message_type == "text_update":
-                # Text update from another user
+                # Text update from another user; also re-base
+                # last_sent_text so the fallback diff path doesn't emit
+                # ops against a stale snapshot
                 if data["user_id"] != self.user_id:
                     self.current_text = data["content"]
+                    self.last_sent_text = data["content"]
                     self.root.after(0, lambda: self.update_text_display(highlight_others=True))
-                    
+
+            elif message_type == "text_op":
+                # Edit operation from another user
+                op = data["op"]
+                if op["user_id"] != self.user_id:
+                    self.root.after(0, lambda: self._apply_remote_op(op))
+
+            elif message_type == "text_batch":
+                # Batch of edit operations from another user
+                ops = [op for op in data["ops"] if op["user_id"] != self.user_id]
+                if ops:
+                    self.root.after(0, lambda: self._apply_remote_ops(ops))
+
+            elif message_type == "truncate":
+                # Server trimmed the front of the shared buffer
+                trimmed = data["new_base_offset"]
+                self.root.after(0, lambda: self._apply_truncate(trimmed))
+
             elif message_type == "user_count_update":
                 # User count update
                 user_count = data["user_count"]
                 self.root.after(0, lambda: self.user_count_label.config(text=f"Users: {user_count}"))
                 
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error: {e}")
+        except ValueError as e:
+            print(f"Message decode error: {e}")
     
+    def _install_text_proxy(self):
+        """Route the text widget's Tcl command through _text_proxy.
+
+        Renaming the widget command lets us see every insert/delete with
+        its exact index and text, so local edits become ops without ever
+        copying the whole buffer back with get("1.0", END).
+        """
+        self._tk_orig = self.text_widget._w + "_orig"
+        self.text_widget.tk.call("rename", self.text_widget._w, self._tk_orig)
+        self.text_widget.tk.createcommand(self.text_widget._w, self._text_proxy)
+
+    def _text_proxy(self, command, *args):
+        """Intercept widget commands, capturing local edits as ops"""
+        if command in ("insert", "delete", "replace") and not self.is_updating_from_server:
+            try:
+                self._capture_local_edit(command, args)
+            except Exception as e:
+                print(f"Failed to capture local edit: {e}")
+        return self.text_widget.tk.call((self._tk_orig, command) + args)
+
+    def _offset(self, index):
+        """Convert a Tk index into a character offset in current_text"""
+        normalized = str(self.text_widget.tk.call(self._tk_orig, "index", index))
+        line, col = normalized.split(".")
+        starts = self._get_line_starts()
+        line = int(line)
+        if line > len(starts):
+            return len(self.current_text)
+        return min(starts[line - 1] + int(col), len(self.current_text))
+
+    def _capture_local_edit(self, command, args):
+        """Turn a local insert/delete/replace into ops and queue them"""
+        ops = []
+        if command == "insert":
+            pos = self._offset(args[0])
+            text = "".join(str(chunk) for chunk in args[1::2])
+            if text:
+                ops.append({"type": "ins", "pos": pos, "text": text, "len": 0})
+        elif command == "delete":
+            start = self._offset(args[0])
+            end = self._offset(args[1]) if len(args) > 1 else min(start + 1, len(self.current_text))
+            if end > start:
+                ops.append({"type": "del", "pos": start, "text": "", "len": end - start})
+        else:  # replace index1 index2 chars ...
+            start = self._offset(args[0])
+            end = self._offset(args[1])
+            text = "".join(str(chunk) for chunk in args[2::2])
+            if end > start:
+                ops.append({"type": "del", "pos": start, "text": "", "len": end - start})
+            if text:
+                ops.append({"type": "ins", "pos": start, "text": text, "len": 0})
+
+        # Update the shadow copy with the same ops that go on the wire
+        for op in ops:
+            if op["type"] == "ins":
+                self.current_text = self.current_text[:op["pos"]] + op["text"] + self.current_text[op["pos"]:]
+            else:
+                self.current_text = self.current_text[:op["pos"]] + self.current_text[op["pos"] + op["len"]:]
+        if ops:
+            self.last_sent_text = self.current_text
+            self._line_starts = None
+            for op in ops:
+                self.send_text_op(op)
+
     def on_text_change(self, event=None):
-        """Handle text changes in the GUI"""
+        """Handle text changes in the GUI (full-buffer diff fallback)"""
         if self.is_updating_from_server:
             return
-        
+
         current_text = self.text_widget.get("1.0", tk.END).rstrip('\n')
-        
+
         # Only send if text actually changed
         if current_text != self.last_sent_text:
+            ops = self._diff_to_ops(self.last_sent_text, current_text)
             self.last_sent_text = current_text
-            self.send_text_update(current_text)
-    
+            self.current_text = current_text
+            self._line_starts = None
+            for op in ops:
+                self.send_text_op(op)
+
+    def _single_edit(self, old, new):
+        """Locate a single changed span via a common prefix/suffix scan.
+
+        Most deltas are one keystroke at the cursor, where a generic
+        diff is overkill. Returns (pos, inserted_text, deleted_len) for
+        an ASCII span, or None to fall back to difflib.
+        """
+        prefix = 0
+        min_len = min(len(old), len(new))
+        while prefix < min_len and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < min_len - prefix and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]:
+            suffix += 1
+
+        inserted = new[prefix:len(new) - suffix]
+        removed = old[prefix:len(old) - suffix]
+        if not (inserted.isascii() and removed.isascii()):
+            return None
+        return prefix, inserted, len(removed)
+
+    def _diff_to_ops(self, old, new):
+        """Diff two text snapshots into a list of insert/delete operations"""
+        ops = []
+
+        fast = self._single_edit(old, new)
+        if fast is not None:
+            pos, inserted, deleted = fast
+            if deleted:
+                ops.append({"type": "del", "pos": pos, "text": "", "len": deleted})
+            if inserted:
+                ops.append({"type": "ins", "pos": pos, "text": inserted, "len": 0})
+            return ops
+
+        matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag in ("delete", "replace"):
+                ops.append({"type": "del", "pos": j1, "text": "", "len": i2 - i1})
+            if tag in ("insert", "replace"):
+                ops.append({"type": "ins", "pos": j1, "text": new[j1:j2], "len": 0})
+        return ops
+
+    def send_text_op(self, op):
+        """Queue an edit operation; bursts are flushed as one batched frame"""
+        if self.websocket and self.connected:
+            op["user_id"] = self.user_id
+            # Milliseconds since epoch: one C call, no strftime work
+            op["ts"] = time.time_ns() // 1_000_000
+
+            with self._pending_lock:
+                self._pending_ops.append(op)
+                schedule = not self._flush_scheduled
+                self._flush_scheduled = True
+
+            # Schedule a single flush when the queue becomes non-empty
+            if schedule:
+                self.root.after(15, self._flush_pending)
+
+    def _flush_pending(self):
+        """Send all queued operations as a single text_batch frame"""
+        with self._pending_lock:
+            ops = self._pending_ops
+            self._pending_ops = []
+            self._flush_scheduled = False
+
+        if not ops or not (self.websocket and self.connected):
+            return
+
+        message = {
+            "type": "text_batch",
+            "ops": ops
+        }
+
+        # Schedule the send on the persistent loop - no new thread or loop
+        asyncio.run_coroutine_threadsafe(
+            self.websocket.send(encode_message(message)),
+            self._loop
+        )
+
+    def _apply_truncate(self, trimmed):
+        """Drop the first `trimmed` characters to match the server's cap"""
+        self.is_updating_from_server = True
+
+        self.text_widget.delete("1.0", self._tk_index(trimmed))
+        self.current_text = self.current_text[trimmed:]
+        self.last_sent_text = self.current_text
+        self._line_starts = None
+
+        self.is_updating_from_server = False
+
+    def _apply_remote_ops(self, ops):
+        """Apply a batch of edit operations in order"""
+        for op in ops:
+            self._apply_remote_op(op)
+
+    def _get_line_starts(self):
+        """Return cached line-start offsets of current_text"""
+        if self._line_starts is None:
+            starts = [0]
+            i = self.current_text.find("\n")
+            while i != -1:
+                starts.append(i + 1)
+                i = self.current_text.find("\n", i + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def _tk_index(self, pos):
+        """Convert a character offset in current_text to a Tk line.column index.
+
+        Uses a cached prefix-sum of line-start offsets so repeated
+        conversions in a batch are O(log lines) instead of having Tk
+        count characters from the start of the buffer every time.
+        """
+        starts = self._get_line_starts()
+        line = bisect.bisect_right(starts, pos)
+        return f"{line}.{pos - starts[line - 1]}"
+
+    def _apply_remote_op(self, op):
+        """Apply an edit operation from another user to the local buffer"""
+        self.is_updating_from_server = True
+
+        # Convert offsets against the pre-op snapshot
+        start = self._tk_index(op["pos"])
+        if op["type"] == "ins":
+            self.text_widget.insert(start, op["text"])
+
+            # Highlight only the inserted range
+            end = self.text_widget.index(f"{start} + {len(op['text'])} chars")
+            self.text_widget.tag_add("other_user", start, end)
+            self.root.after(2000, lambda: self.text_widget.tag_remove("other_user", "1.0", tk.END))
+        elif op["type"] == "del":
+            end = self._tk_index(op["pos"] + op["len"])
+            self.text_widget.delete(start, end)
+
+        # Keep the local snapshots in sync so our next diff is against
+        # the text the server now has
+        if op["type"] == "ins":
+            self.current_text = self.current_text[:op["pos"]] + op["text"] + self.current_text[op["pos"]:]
+        else:
+            self.current_text = self.current_text[:op["pos"]] + self.current_text[op["pos"] + op["len"]:]
+        self.last_sent_text = self.current_text
+        self._line_starts = None
+
+        self.is_updating_from_server = False
+
     def send_text_update(self, text):
         """Send text update to server via WebSocket"""
         if self.websocket and self.connected:
@@ -536,19 +839,20 @@ class CollaborativeTextEditor:
                 "type": "text_update",
                 "content": text,
                 "user_id": self.user_id,
-                "timestamp": datetime.now().isoformat()
+                "ts": time.time_ns() // 1_000_000
             }
-            
-            # Send in separate thread
-            threading.Thread(
-                target=lambda: asyncio.run(self.websocket.send(json.dumps(message))),
-                daemon=True
-            ).start()
+
+            # Schedule the send on the persistent loop - no new thread or loop
+            asyncio.run_coroutine_threadsafe(
+                self.websocket.send(encode_message(message)),
+                self._loop
+            )
     
     def update_text_display(self, highlight_others=False):
         """Update the text display in the GUI"""
         self.is_updating_from_server = True
-        
+        self._line_starts = None
+
         # Clear current text
         self.text_widget.delete("1.0", tk.END)
         
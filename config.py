@@ -34,24 +34,34 @@ class Config:
     
     # File Configuration
     TEXT_FILE: str = os.getenv("TEXT_FILE", "shared_text.txt")
+
+    # Maximum size of the shared text buffer; older content is trimmed
+    # from the front once this is exceeded
+    MAX_TEXT_BYTES: int = int(os.getenv("MAX_TEXT_BYTES", "1048576"))
     
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "info")
-    
+
+    # URLs built once at class-creation time; the underlying env vars
+    # do not change at runtime, so callers get a cached string
+    SERVER_URL: str = f"http://{CLIENT_HOST}:{CLIENT_PORT}"
+    WEBSOCKET_URL: str = f"ws://{WS_HOST}:{WS_PORT}/ws"
+    API_DOCS_URL: str = f"http://{CLIENT_HOST}:{CLIENT_PORT}/docs"
+
     @classmethod
     def get_server_url(cls) -> str:
         """Get the server URL for REST API calls"""
-        return f"http://{cls.CLIENT_HOST}:{cls.CLIENT_PORT}"
-    
+        return cls.SERVER_URL
+
     @classmethod
     def get_websocket_url(cls) -> str:
         """Get the WebSocket URL for real-time connections"""
-        return f"ws://{cls.WS_HOST}:{cls.WS_PORT}/ws"
-    
+        return cls.WEBSOCKET_URL
+
     @classmethod
     def get_api_docs_url(cls) -> str:
         """Get the API documentation URL"""
-        return f"http://{cls.CLIENT_HOST}:{cls.CLIENT_PORT}/docs"
+        return cls.API_DOCS_URL
     
     @classmethod
     def print_config(cls):
@@ -64,6 +74,7 @@ class Config:
         print(f"   WebSocket Host: {cls.WS_HOST}")
         print(f"   WebSocket Port: {cls.WS_PORT}")
         print(f"   Text File: {cls.TEXT_FILE}")
+        print(f"   Max Text Bytes: {cls.MAX_TEXT_BYTES}")
         print(f"   Log Level: {cls.LOG_LEVEL}")
         print(f"   Server URL: {cls.get_server_url()}")
         print(f"   WebSocket URL: {cls.get_websocket_url()}")
@@ -12,6 +12,8 @@ collaborative text editing. It handles:
 
 import json
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 from datetime import datetime
 import os
@@ -21,6 +23,27 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import uvicorn
 
+# msgpack is optional; fall back to JSON text frames without it
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# orjson is optional; it speeds up the JSON encode/decode paths
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# uvloop is optional (and unavailable on Windows); fall back to the
+# default asyncio event loop without it
+try:
+    import uvloop
+    LOOP_IMPL = "uvloop"
+except ImportError:
+    uvloop = None
+    LOOP_IMPL = "auto"
+
 # Import configuration
 from config import Config
 
@@ -36,14 +59,23 @@ class TextResponse(BaseModel):
     user_count: int
 
 # Global state
-connected_clients: List[WebSocket] = []
+connected_clients: set[WebSocket] = set()
+
+# Per-client outbound queue and writer task, keyed by socket
+client_queues: Dict[WebSocket, asyncio.Queue] = {}
+client_writers: Dict[WebSocket, asyncio.Task] = {}
 current_text: str = ""
 last_updated: datetime = datetime.now()
-user_count: int = 0
 
 # File for persistence
 TEXT_FILE = Config.TEXT_FILE
 
+# Cap on the shared text buffer
+MAX_TEXT_BYTES = Config.MAX_TEXT_BYTES
+
+# Set whenever current_text changes; the background persister picks it up
+_dirty = asyncio.Event()
+
 # Load existing text if file exists
 if os.path.exists(TEXT_FILE):
     with open(TEXT_FILE, 'r', encoding='utf-8') as f:
@@ -51,6 +83,43 @@ if os.path.exists(TEXT_FILE):
 
 app = FastAPI(title="Collaborative Text Editor API")
 
+def _atomic_write(text: str):
+    """Write text to TEXT_FILE atomically via a temp file and os.replace"""
+    tmp_file = TEXT_FILE + ".tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_file, TEXT_FILE)
+
+async def _persister():
+    """Persist current_text in the background, coalescing bursts of updates.
+
+    Update handlers just set _dirty and return; this task waits ~250 ms
+    after the first change so a burst of keystrokes collapses into a
+    single file write. Writes run on a dedicated single-thread executor,
+    so the event loop never blocks on disk and writes serialize without
+    any locking.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await _dirty.wait()
+        _dirty.clear()
+        await asyncio.sleep(0.25)
+        await loop.run_in_executor(app.state.io_pool, _atomic_write, current_text)
+
+@app.on_event("startup")
+async def _start_persister():
+    app.state.io_pool = ThreadPoolExecutor(max_workers=1)
+    asyncio.create_task(_persister())
+
+@app.on_event("shutdown")
+async def _flush_on_shutdown():
+    # Flush unconditionally: _persister clears _dirty before its
+    # coalescing sleep, so a shutdown during the sleep would find the
+    # flag clear and skip the final burst of edits. One extra write of
+    # an unchanged file is cheap; losing acknowledged edits is not.
+    app.state.io_pool.submit(_atomic_write, current_text)
+    app.state.io_pool.shutdown(wait=True)
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -83,14 +152,17 @@ async def update_text(update: TextUpdate):
     
     current_text = update.content
     last_updated = update.timestamp
-    
-    # Save to file
-    with open(TEXT_FILE, 'w', encoding='utf-8') as f:
-        f.write(current_text)
-    
+
+    # Keep the full-content broadcast within the buffer cap
+    if _enforce_text_cap():
+        update.content = current_text
+
+    # Mark dirty; the background persister writes the file
+    _dirty.set()
+
     # Broadcast to all connected clients
-    await broadcast_update(update)
-    
+    broadcast_update(update)
+
     return {"message": "Text updated successfully", "timestamp": update.timestamp}
 
 @app.get("/status")
@@ -103,104 +175,324 @@ async def get_status():
         "file_path": TEXT_FILE
     }
 
-async def broadcast_update(update: TextUpdate):
+async def _client_writer(websocket: WebSocket, queue: asyncio.Queue):
+    """Drain one client's outbound queue and write frames to its socket.
+
+    Every client gets its own writer task, so a slow connection only
+    backs up its own queue instead of stalling the broadcast for
+    everyone else.
+    """
+    try:
+        while True:
+            payload = await queue.get()
+            await send_message(websocket, payload)
+    except (asyncio.CancelledError, Exception):
+        # Socket closed or writer cancelled; the endpoint cleans up
+        pass
+
+def queue_broadcast(payload, exclude: Optional[WebSocket] = None):
+    """Queue one pre-encoded payload for every connected client.
+
+    The originator of an update already has the content locally, so it
+    can be passed as exclude to skip a pointless echo. A full queue
+    means the client is too slow to keep up; drop its oldest pending
+    frame rather than back-pressuring the broadcaster.
+    """
+    for client, queue in client_queues.items():
+        if client is exclude:
+            continue
+        try:
+            queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            queue.put_nowait(payload)
+
+def broadcast_update(update: TextUpdate, exclude: Optional[WebSocket] = None):
     """Broadcast text update to all connected WebSocket clients"""
     if connected_clients:
         message = {
             "type": "text_update",
             "content": update.content,
             "user_id": update.user_id,
-            "timestamp": update.timestamp.isoformat() if update.timestamp else None
+            "ts": int(update.timestamp.timestamp() * 1000) if update.timestamp else None
         }
-        
-        # Send to all connected clients
-        await asyncio.gather(
-            *[client.send_text(json.dumps(message)) for client in connected_clients],
-            return_exceptions=True
-        )
-
-async def send_initial_state(websocket: WebSocket):
-    """Send current state to a newly connected client"""
+
+        # Encode once; every client queue gets the same payload
+        queue_broadcast(encode_message(message), exclude)
+
+# Payloads bigger than this get encoded/decoded off the event loop;
+# for small ones the thread dispatch would cost more than the work
+_OFFLOAD_THRESHOLD = 4096
+
+def encode_message(message: dict):
+    """Encode a wire message as a msgpack binary frame, or JSON text without msgpack"""
+    if msgpack is not None:
+        message = dict(message)
+        message["v"] = 2
+        return msgpack.packb(message, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(message).decode()
+    return json.dumps(message)
+
+def decode_message(data):
+    """Decode a wire message from a binary (msgpack) or text (JSON) frame"""
+    if isinstance(data, (bytes, bytearray)) and msgpack is not None:
+        return msgpack.unpackb(data, raw=False)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+async def send_message(websocket: WebSocket, payload):
+    """Send an encoded payload on the right frame type"""
+    if isinstance(payload, bytes):
+        await websocket.send_bytes(payload)
+    else:
+        await websocket.send_text(payload)
+
+async def receive_payload(websocket: WebSocket):
+    """Receive one raw frame from a client.
+
+    Kept separate from decoding so a timeout (the endpoint's drain loop)
+    can only ever cancel the socket read; once a frame has been consumed
+    it is always decoded and handled, never dropped mid-decode.
+    """
+    data = await websocket.receive()
+    if data.get("type") == "websocket.disconnect":
+        raise WebSocketDisconnect(data.get("code") or 1000)
+    return data.get("bytes") if data.get("bytes") is not None else data.get("text")
+
+async def decode_payload(payload) -> dict:
+    """Decode a raw frame, off the loop when it is large.
+
+    Big payloads are parsed via asyncio.to_thread so one large paste
+    does not stall every other client's traffic.
+    """
+    if len(payload) > _OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(decode_message, payload)
+    return decode_message(payload)
+
+async def receive_message(websocket: WebSocket):
+    """Receive one client message; returns (decoded message, raw frame).
+
+    The raw frame is kept so op messages can be relayed to the other
+    clients byte-for-byte without paying a re-encode.
+    """
+    payload = await receive_payload(websocket)
+    return await decode_payload(payload), payload
+
+def apply_text_op(text: str, op: dict) -> str:
+    """Apply an insert/delete operation to a text buffer via slice splice.
+
+    Ops are plain wire dicts: {"type": "ins"|"del", "pos": int,
+    "text": str, "len": int, "user_id": str, "ts": int}. They arrive
+    once per keystroke per client, so they are applied without paying a
+    pydantic model construction each.
+    """
+    if op["type"] == "ins":
+        return text[:op["pos"]] + op["text"] + text[op["pos"]:]
+    elif op["type"] == "del":
+        return text[:op["pos"]] + text[op["pos"] + op["len"]:]
+    return text
+
+def broadcast_ops(ops: List[dict], exclude: Optional[WebSocket] = None):
+    """Broadcast a batch of edit operations to all connected WebSocket clients"""
+    if connected_clients:
+        message = {
+            "type": "text_batch",
+            "ops": ops
+        }
+
+        # Encode once; every client queue gets the same payload
+        queue_broadcast(encode_message(message), exclude)
+
+def _enforce_text_cap() -> int:
+    """Trim current_text from the front when it exceeds MAX_TEXT_BYTES.
+
+    Trims to the nearest newline past the overflow so lines stay whole,
+    and returns the number of characters removed (0 if under the cap)
+    so clients can be told to re-anchor.
+    """
+    global current_text
+    overflow = len(current_text) - MAX_TEXT_BYTES
+    if overflow <= 0:
+        return 0
+    newline = current_text.find("\n", overflow)
+    trimmed = newline + 1 if newline != -1 else overflow
+    current_text = current_text[trimmed:]
+    return trimmed
+
+def broadcast_truncate(trimmed: int):
+    """Tell every client to drop the first `trimmed` characters"""
+    message = {
+        "type": "truncate",
+        "new_base_offset": trimmed
+    }
+    queue_broadcast(encode_message(message))
+
+def _cleanup_client(websocket: WebSocket):
+    """Drop a client's bookkeeping and cancel its writer task"""
+    connected_clients.discard(websocket)
+    client_queues.pop(websocket, None)
+    writer = client_writers.pop(websocket, None)
+    if writer is not None:
+        writer.cancel()
+
+def send_initial_state(websocket: WebSocket):
+    """Queue the current state for a newly connected client.
+
+    The snapshot is captured and put on the client's own outbound queue
+    synchronously - no await between reading current_text and the
+    put_nowait - so per-connection FIFO ordering guarantees that no
+    concurrent broadcast can reach the client ahead of a snapshot that
+    does not yet contain it. The once-per-connect encode stays on the
+    loop; that is the price of the ordering guarantee.
+    """
     message = {
         "type": "initial_state",
         "content": current_text,
         "last_updated": last_updated.isoformat(),
         "user_count": len(connected_clients)
     }
-    await websocket.send_text(json.dumps(message))
+    client_queues[websocket].put_nowait(encode_message(message))
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time updates"""
-    global user_count
-    
+    global current_text, last_updated
+
+    # No explicit TCP_NODELAY handling: uvicorn's ASGI scope does not
+    # expose the transport, and asyncio (since 3.6) and uvloop already
+    # disable Nagle on TCP transports by default, so small frames are
+    # not held back waiting to coalesce.
     await websocket.accept()
-    connected_clients.append(websocket)
-    user_count = len(connected_clients)
-    
-    print(f"Client connected. Total clients: {user_count}")
-    
+    connected_clients.add(websocket)
+    client_queues[websocket] = asyncio.Queue(maxsize=256)
+    client_writers[websocket] = asyncio.create_task(
+        _client_writer(websocket, client_queues[websocket])
+    )
+
+    print(f"Client connected. Total clients: {len(connected_clients)}")
+
     # Send current state to new client
-    await send_initial_state(websocket)
-    
-    # Broadcast user count update
-    await broadcast_user_count()
-    
+    send_initial_state(websocket)
+
+    # Broadcast user count update; the new client already got the count
+    # in its initial state
+    broadcast_user_count(exclude=websocket)
+
     try:
+        pending = None
         while True:
             # Receive message from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            if message["type"] == "text_update":
-                # Handle text update from client
-                update = TextUpdate(
-                    content=message["content"],
-                    user_id=message.get("user_id", "anonymous"),
-                    timestamp=datetime.now()
-                )
-                
+            if pending is not None:
+                message, frame = pending
+                pending = None
+            else:
+                message, frame = await receive_message(websocket)
+
+            if message["type"] in ("text_op", "text_batch"):
+                # Handle edit operations from a client
+                if message["type"] == "text_batch":
+                    raw_ops = list(message["ops"])
+                else:
+                    raw_ops = [message["op"]]
+
+                # As long as only one inbound frame contributed, it can
+                # be relayed to the other clients byte-for-byte
+                relay_frame = frame
+
+                # Drain ops that arrive within ~10 ms so a burst of
+                # keystrokes is applied and broadcast as one frame
+                while pending is None:
+                    # Only the raw socket read runs under the timeout;
+                    # a frame that has been consumed is always decoded
+                    try:
+                        next_frame = await asyncio.wait_for(
+                            receive_payload(websocket), timeout=0.01
+                        )
+                    except asyncio.TimeoutError:
+                        break
+                    next_message = await decode_payload(next_frame)
+                    if next_message["type"] == "text_op":
+                        raw_ops.append(next_message["op"])
+                        relay_frame = None
+                    elif next_message["type"] == "text_batch":
+                        raw_ops.extend(next_message["ops"])
+                        relay_frame = None
+                    else:
+                        pending = (next_message, next_frame)
+
+                for op in raw_ops:
+                    current_text = apply_text_op(current_text, op)
+                last_updated = datetime.now()
+
+                # Mark dirty; the background persister writes the file
+                _dirty.set()
+
+                # Broadcast the operations, not the full content; reuse
+                # the original frame when nothing was merged into it
+                if relay_frame is not None:
+                    queue_broadcast(relay_frame, exclude=websocket)
+                else:
+                    broadcast_ops(raw_ops, exclude=websocket)
+
+                # Enforce the buffer cap after the ops have gone out so
+                # every client (originator included) re-anchors in step
+                trimmed = _enforce_text_cap()
+                if trimmed:
+                    broadcast_truncate(trimmed)
+
+            elif message["type"] == "text_update":
+                # Handle text update from client; no pydantic model is
+                # built here, validation only pays off on the REST path
+                user_id = message.get("user_id", "anonymous")
+
                 # Update global state
-                global current_text, last_updated
-                current_text = update.content
-                last_updated = update.timestamp
-                
-                # Save to file
-                with open(TEXT_FILE, 'w', encoding='utf-8') as f:
-                    f.write(current_text)
-                
+                current_text = message["content"]
+                last_updated = datetime.now()
+
+                # Keep the full-content broadcast within the buffer cap
+                _enforce_text_cap()
+
+                # Mark dirty; the background persister writes the file
+                _dirty.set()
+
                 # Broadcast to all other clients
-                await broadcast_update(update)
-                
-                print(f"Text updated by {update.user_id}")
+                out = {
+                    "type": "text_update",
+                    "content": current_text,
+                    "user_id": user_id,
+                    "ts": time.time_ns() // 1_000_000
+                }
+                queue_broadcast(encode_message(out), exclude=websocket)
+
+                print(f"Text updated by {user_id}")
     
     except WebSocketDisconnect:
-        connected_clients.remove(websocket)
-        user_count = len(connected_clients)
-        print(f"Client disconnected. Total clients: {user_count}")
-        
+        _cleanup_client(websocket)
+        print(f"Client disconnected. Total clients: {len(connected_clients)}")
+
         # Broadcast updated user count
-        await broadcast_user_count()
-    
+        broadcast_user_count()
+
     except Exception as e:
         print(f"WebSocket error: {e}")
         if websocket in connected_clients:
-            connected_clients.remove(websocket)
-            user_count = len(connected_clients)
-            await broadcast_user_count()
+            _cleanup_client(websocket)
+            broadcast_user_count()
 
-async def broadcast_user_count():
+def broadcast_user_count(exclude: Optional[WebSocket] = None):
     """Broadcast updated user count to all clients"""
     if connected_clients:
         message = {
             "type": "user_count_update",
-            "user_count": user_count
+            "user_count": len(connected_clients)
         }
-        
-        await asyncio.gather(
-            *[client.send_text(json.dumps(message)) for client in connected_clients],
-            return_exceptions=True
-        )
+
+        queue_broadcast(encode_message(message), exclude)
 
 if __name__ == "__main__":
     print("Starting Collaborative Text Editor Server...")
@@ -212,6 +504,10 @@ if __name__ == "__main__":
         "server:app",
         host=Config.SERVER_HOST,
         port=Config.SERVER_PORT,
-        reload=True,
+        loop=LOOP_IMPL,
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False,
+        reload=False,
         log_level=Config.LOG_LEVEL
     )